@@ -7,10 +7,12 @@
 #########################################################
 
 import sqlite3
-import json
+import orjson
 from datetime import datetime
 import argparse
+import os
 import sys
+from itertools import groupby
 from pathlib import Path
 
 def connect_to_database(db_path):
@@ -26,72 +28,83 @@ def connect_to_database(db_path):
         sys.exit(1)
 
 def fetch_scan_data(conn):
-    """Fetch all scan data from the database."""
-    try:
-        cursor = conn.cursor()
-        
-        # Get all hosts with their details
-        cursor.execute("""
-            SELECT 
-                h.id, h.ip, h.hostname, h.last_scan, h.os_guess, h.status
-            FROM hosts h
-        """)
+    """Yield scan data from the database one host at a time."""
+    cursor = conn.cursor()
+    
+    # Get all hosts joined with their ports in a single pass
+    cursor.execute("""
+        SELECT 
+            h.id, h.ip, h.hostname, h.last_scan, h.os_guess, h.status,
+            p.port_number, p.service, p.version
+        FROM hosts h
+        LEFT JOIN ports p ON p.host_id = h.id
+        ORDER BY h.id
+    """)
+    
+    for host_id, rows in groupby(cursor, key=lambda row: row[0]):
+        rows = list(rows)
+        _, ip, hostname, last_scan, os_guess, status = rows[0][:6]
         
-        hosts = []
-        for host_row in cursor.fetchall():
-            host_id, ip, hostname, last_scan, os_guess, status = host_row
-            
-            # Get all ports for this host
-            cursor.execute("""
-                SELECT port_number, service, version
-                FROM ports
-                WHERE host_id = ?
-            """, (host_id,))
-            
-            ports = []
-            for port_row in cursor.fetchall():
-                port_number, service, version = port_row
-                ports.append({
-                    "port": port_number,
-                    "service": service,
-                    "version": version
-                })
-            
-            # Build host dictionary
-            host_data = {
-                "ip": ip,
-                "hostname": hostname,
-                "last_scan": last_scan,
-                "os_guess": os_guess,
-                "status": status,
-                "ports": ports
-            }
-            
-            hosts.append(host_data)
+        ports = []
+        for port_row in rows:
+            port_number, service, version = port_row[6:]
+            # LEFT JOIN yields a single NULL port row for hosts without ports
+            if port_number is None:
+                continue
+            ports.append({
+                "port": port_number,
+                "service": service,
+                "version": version
+            })
         
-        return {
-            "scan_results": hosts,
-            "metadata": {
+        # Build host dictionary
+        yield {
+            "ip": ip,
+            "hostname": hostname,
+            "last_scan": last_scan,
+            "os_guess": os_guess,
+            "status": status,
+            "ports": ports
+        }
+
+def export_to_json(hosts, output_file):
+    """Stream the hosts to a JSON file, one host object per line."""
+    total_hosts = 0
+    # Write beside the target and swap it in at the end, so a failed export
+    # never leaves a truncated file in place of the previous one
+    tmp_file = f"{output_file}.tmp"
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(b'{"scan_results": [\n')
+            for host_data in hosts:
+                if total_hosts:
+                    f.write(b',\n')
+                f.write(orjson.dumps(host_data))
+                total_hosts += 1
+            metadata = {
                 "export_date": datetime.now().isoformat(),
-                "total_hosts": len(hosts)
+                "total_hosts": total_hosts
             }
-        }
-        
+            f.write(b'\n],\n"metadata": ' + orjson.dumps(metadata, option=orjson.OPT_INDENT_2) + b'}\n')
+        os.replace(tmp_file, output_file)
+        print(f"Successfully exported scan results to {output_file}")
+        print(f"Total hosts exported: {total_hosts}")
     except sqlite3.Error as e:
         print(f"Error fetching data: {e}")
+        discard_file(tmp_file)
         sys.exit(1)
-
-def export_to_json(data, output_file):
-    """Export the data to a JSON file."""
-    try:
-        with open(output_file, 'w') as f:
-            json.dump(data, f, indent=4)
-        print(f"Successfully exported scan results to {output_file}")
-        print(f"Total hosts exported: {data['metadata']['total_hosts']}")
     except IOError as e:
         print(f"Error writing to file: {e}")
+        discard_file(tmp_file)
         sys.exit(1)
 
+def discard_file(path):
+    """Remove a partially written export, ignoring a file that was never created."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 def main():
     parser = argparse.ArgumentParser(description='Export Violette scanner results to JSON')
     parser.add_argument('--db', default='scanner.db', help='Input database file (default: scanner.db)')
@@ -102,12 +115,9 @@ def main():
     # Connect to database
     conn = connect_to_database(args.db)
     
-    # Fetch all scan data
+    # Stream scan data straight into the JSON file
     print(f"Fetching data from {args.db}...")
-    scan_data = fetch_scan_data(conn)
-    
-    # Export to JSON
-    export_to_json(scan_data, args.output)
+    export_to_json(fetch_scan_data(conn), args.output)
     
     # Close database connection
     conn.close()
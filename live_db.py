@@ -7,87 +7,152 @@
 #########################################################
 
 
-from flask import Flask, render_template_string, Response
+from quart import Quart, render_template_string, Response, request
 import sqlite3
 import argparse
 import logging
 from datetime import datetime
-import json
-import time
+import orjson
+import asyncio
+import os
+import threading
+from pathlib import Path
+
+READER_PRAGMAS = """
+    PRAGMA cache_size=-1000000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=30000000000;
+"""
 
 class SimpleScanServer:
     def __init__(self, db_path, host='0.0.0.0', port=8080):
         self.db_path = db_path
         self.host = host
         self.port = port
-        self.app = Flask(__name__)
-        self.last_modified = self.get_last_modified()
+        self.app = Quart(__name__)
+        self._tls = threading.local()
+        # ip -> ((host_id, last_scan), rendered row, JSON bytes); rebuilt per host only when it changes
+        self._host_rows = {}
+        self._frame = None
+        self._cache_lock = threading.Lock()
         self.setup_routes()
 
-    def get_last_modified(self):
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT MAX(last_scan) FROM hosts')
-                result = cursor.fetchone()[0]
-                return result if result else ''
-        except sqlite3.Error:
-            return ''
+    def _reader(self):
+        """Return this thread's read-only database connection, opening it on first use"""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.executescript(READER_PRAGMAS)
+            self._tls.conn = conn
+        return conn
+
+    def get_db_signature(self):
+        """Cheap change detector: mtime and size of the database and its WAL file"""
+        signature = []
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def refresh_cache(self):
+        """Re-render only the hosts that were added or rescanned since the last call"""
+        conn = self._reader()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, ip, hostname, os_guess, last_scan FROM hosts')
+        seen = set()
+        with self._cache_lock:
+            for host_id, ip, hostname, os_guess, last_scan in cursor:
+                seen.add(ip)
+                cached = self._host_rows.get(ip)
+                if cached is not None and cached[0] == (host_id, last_scan):
+                    continue
+                port_info = ', '.join(
+                    f"{port}/{service}" + (f" ({version})" if version else '')
+                    for port, service, version in conn.execute('''
+                        SELECT port_number, service, version
+                        FROM ports
+                        WHERE host_id = ?
+                        ORDER BY port_number
+                    ''', (host_id,))
+                )
+                row = (ip, hostname, os_guess, last_scan, port_info or None)
+                # Serialize each host once; SSE frames are stitched from these bytes
+                encoded = orjson.dumps({
+                    'ip': ip,
+                    'hostname': hostname,
+                    'os': os_guess,
+                    'ports': port_info or '-',
+                    'last_scan': last_scan.split('.')[0].replace('T', ' ')
+                })
+                self._host_rows[ip] = ((host_id, last_scan), row, encoded)
+                self._frame = None
+            for ip in self._host_rows.keys() - seen:
+                del self._host_rows[ip]
+                self._frame = None
 
     def get_scan_results(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT 
-                        h.ip,
-                        h.hostname,
-                        h.os_guess,
-                        h.last_scan,
-                        GROUP_CONCAT(p.port_number || '/' || p.service || 
-                                   CASE WHEN p.version != '' 
-                                   THEN ' (' || p.version || ')' 
-                                   ELSE '' END, ', ') as port_info
-                    FROM hosts h
-                    LEFT JOIN ports p ON h.id = p.host_id
-                    GROUP BY h.ip
-                    ORDER BY h.ip
-                ''')
-                return cursor.fetchall()
+            self.refresh_cache()
+        except sqlite3.Error as e:
+            logging.error(f"Database error: {e}")
+        with self._cache_lock:
+            return [self._host_rows[ip][1] for ip in sorted(self._host_rows)]
+
+    def get_stream_payload(self):
+        """Return the JSON array for one SSE message, rebuilt only after a change"""
+        try:
+            self.refresh_cache()
         except sqlite3.Error as e:
             logging.error(f"Database error: {e}")
-            return []
+        with self._cache_lock:
+            if self._frame is None:
+                self._frame = b'[' + b','.join(
+                    self._host_rows[ip][2] for ip in sorted(self._host_rows)
+                ) + b']'
+            return self._frame
 
     def setup_routes(self):
         @self.app.route('/')
-        def index():
-            results = self.get_scan_results()
-            return render_template_string(HTML_TEMPLATE, results=results)
+        async def index():
+            # The page fills itself from /stream; only render rows when asked to
+            results = []
+            if request.args.get('initial') == '1':
+                # sqlite3 blocks, so queries run on worker threads off the event loop
+                results = await asyncio.to_thread(self.get_scan_results)
+            return await render_template_string(HTML_TEMPLATE, results=results)
 
         @self.app.route('/stream')
-        def stream():
-            def event_stream():
-                last_check = self.get_last_modified()
+        async def stream():
+            async def event_stream():
+                last_signature = self.get_db_signature()
+                # Send the current table straight away so new clients aren't left empty
+                last_payload = await asyncio.to_thread(self.get_stream_payload)
+                yield b"data: " + last_payload + b"\n\n"
                 while True:
-                    current = self.get_last_modified()
-                    if current != last_check:
-                        results = self.get_scan_results()
-                        data = []
-                        for row in results:
-                            data.append({
-                                'ip': row[0],
-                                'hostname': row[1],
-                                'os': row[2],
-                                'ports': row[4] if row[4] else '-',
-                                'last_scan': row[3].split('.')[0].replace('T', ' ')
-                            })
-                        yield f"data: {json.dumps(data)}\n\n"
-                        last_check = current
-                    time.sleep(1)
-            return Response(event_stream(), mimetype="text/event-stream")
+                    # Only hit the database once the files have actually been written to
+                    signature = self.get_db_signature()
+                    if signature == last_signature:
+                        await asyncio.sleep(1)
+                        continue
+                    last_signature = signature
+                    # The frame object is only rebuilt when a host row changed, so
+                    # identity tells us whether there is anything new to push
+                    payload = await asyncio.to_thread(self.get_stream_payload)
+                    if payload is not last_payload:
+                        yield b"data: " + payload + b"\n\n"
+                        last_payload = payload
+                    await asyncio.sleep(1)
+            response = Response(event_stream(), mimetype="text/event-stream")
+            # SSE connections are long-lived; don't let Quart time them out
+            response.timeout = None
+            return response
 
     def run(self):
-        self.app.run(host=self.host, port=self.port, threaded=True)
+        self.app.run(host=self.host, port=self.port)
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -11,13 +11,18 @@ import socket
 import sqlite3
 import ipaddress
 import concurrent.futures
+import multiprocessing
 import argparse
 from datetime import datetime
+from pathlib import Path
 import nmap
 import logging
 import sys
 import os
+import shutil
 import signal
+import threading
+import queue
 import psutil
 import requests
 import json
@@ -32,6 +37,91 @@ from rich.text import Text
 VERSION = "1.0.0"
 GITHUB_REPO = "edgerunner0x01/violette"
 
+# Kept as module constants so every call hits the sqlite3 statement cache
+SQL_UPSERT_HOST = '''
+    INSERT INTO hosts (ip, hostname, last_scan, os_guess, status)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(ip) DO UPDATE SET
+        hostname = excluded.hostname,
+        last_scan = excluded.last_scan,
+        os_guess = excluded.os_guess,
+        status = excluded.status
+    RETURNING id
+'''
+SQL_DELETE_PORTS = 'DELETE FROM ports WHERE host_id = ?'
+SQL_INSERT_PORT = '''
+    INSERT INTO ports (host_id, port_number, service, version)
+    VALUES (?, ?, ?, ?)
+'''
+SQL_RECENT_HOSTS = '''
+    SELECT ip FROM hosts
+    WHERE datetime(last_scan) > datetime('now', '-' || ? || ' hours')
+'''
+
+# Applied to every connection we open; journal settings only on read/write ones
+CONNECTION_PRAGMAS = """
+    PRAGMA cache_size=-1000000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=30000000000;
+"""
+WRITER_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA foreign_keys=ON;
+"""
+
+# Each scan worker process owns its own PortScanner; nothing is shared across workers
+_worker_nm = None
+
+def _init_worker():
+    global _worker_nm
+    # Ctrl+C is handled by the parent, which tears the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_nm = nmap.PortScanner()
+
+def _scan_host(ip, timeout):
+    """Scan a single host in a worker process and return the rows to store"""
+    scan_args = f'-sS -sV -O -A --host-timeout {timeout}s'
+    _worker_nm.scan(ip, arguments=scan_args)
+    # Stamp once, as soon as the scan returns, so last_scan tracks when results land
+    now_iso = datetime.now().isoformat()
+    
+    if ip not in _worker_nm.all_hosts():
+        return None
+
+    scan_result = _worker_nm[ip]
+    
+    os_guess = 'Unknown'
+    try:
+        if 'osmatch' in scan_result and scan_result['osmatch']:
+            os_guess = scan_result['osmatch'][0].get('name', 'Unknown')
+        elif 'osclass' in scan_result and scan_result['osclass']:
+            os_guess = scan_result['osclass'][0].get('osfamily', 'Unknown')
+    except (KeyError, IndexError):
+        os_guess = 'Unknown'
+
+    # Prefer the PTR name nmap already looked up; fall back to our own lookup
+    hostname = scan_result.hostname() or socket.getfqdn(ip)
+    return {
+        'ip': ip,
+        'os': os_guess,
+        'ports': scan_result.get('tcp', {}),
+        'host_row': (ip, hostname, now_iso,
+                     os_guess, scan_result['status']['state']),
+        'port_rows': [
+            (port, port_info.get('name', ''), port_info.get('version', ''))
+            for proto in scan_result.all_protocols()
+            for port, port_info in scan_result[proto].items()
+        ]
+    }
+
+def tune_connection(conn, writer=False):
+    """Apply the throughput PRAGMAs to a freshly opened connection"""
+    if writer:
+        conn.executescript(WRITER_PRAGMAS)
+    conn.executescript(CONNECTION_PRAGMAS)
+    return conn
+
 BANNER_TEXT = f"""[cyan]
 #########################################################
 #     Violette - Network Scanner Framework              #
@@ -50,19 +140,26 @@ BANNER_TEXT = f"""[cyan]
 [yellow][ * ][/] Loading modules...\n"""
 
 class NetworkScanner:
-    def __init__(self, db_path='scanner.db', threads=10, timeout=300):
+    def __init__(self, db_path='scanner.db', threads=10, timeout=300, check_updates=True):
         self.fresh_scan = False  
         self.version = VERSION
+        self.latest_version = None
+        self.update_check_failed = False
+        self._update_thread = None
         self.console = Console()
         self.display_banner()
         self.check_dependencies()
-        self.check_for_updates()
+        if check_updates:
+            self.check_for_updates()
         self.check_root()
         self.db_path = db_path
         self.threads = threads
         self.timeout = timeout
+        self._tls = threading.local()
+        self._connections = []
+        self._conn_lock = threading.Lock()
         self.setup_database()
-        self.nm = nmap.PortScanner()
+        self.start_writer()
         self.setup_logging()
         self.active_hosts = 0
         signal.signal(signal.SIGINT, self.handle_exit)
@@ -71,7 +168,7 @@ class NetworkScanner:
         """Check if all required dependencies are installed"""
         try:
             self.console.print("[yellow][ * ][/] Checking Nmap installation...")
-            if os.system("which nmap > /dev/null 2>&1") != 0:
+            if shutil.which("nmap") is None:
                 self.console.print("[red][ ! ] Error: Nmap is not installed. Please install it first.[/]")
                 sys.exit(1)
             self.console.print("[green][ ✓ ][/] All dependencies satisfied.")
@@ -84,22 +181,40 @@ class NetworkScanner:
         self.console.print(BANNER_TEXT)
         
     def check_for_updates(self):
-        """Check for updates from GitHub repository"""
+        """Start checking GitHub for a newer release in the background"""
+        self.console.print("[yellow][ * ][/] Checking for updates in the background...")
+        self._update_thread = threading.Thread(target=self._fetch_latest_version, daemon=True)
+        self._update_thread.start()
+
+    def _fetch_latest_version(self):
         try:
-            self.console.print("[yellow][ * ][/] Checking for updates...")
-            response = requests.get(f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest")
+            response = requests.get(f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest", timeout=10)
             if response.status_code == 200:
-                latest_version = response.json()["tag_name"].lstrip("v")
-                if version.parse(latest_version) > version.parse(self.version):
-                    self.console.print(f"[red][ ! ][/] New version {latest_version} available!")
-                    if self.prompt_update():
-                        self.update_tool(latest_version)
-                else:
-                    self.console.print("[green][ ✓ ][/] You're running the latest version!")
+                self.latest_version = response.json()["tag_name"].lstrip("v")
         except Exception as e:
-            self.console.print("[red][ ! ][/] Failed to check for updates")
+            self.update_check_failed = True
             logging.error(f"Update check failed: {e}")
 
+    def report_updates(self):
+        """Report the background update check result once scanning is done"""
+        if self._update_thread is None:
+            return
+        self._update_thread.join(timeout=5)
+        if self._update_thread.is_alive():
+            # Still waiting on GitHub; don't hold up the exit for it
+            return
+        if self.update_check_failed:
+            self.console.print("[red][ ! ][/] Failed to check for updates")
+        elif self.latest_version is None:
+            # No release published (non-200 response); nothing to report
+            return
+        elif version.parse(self.latest_version) > version.parse(self.version):
+            self.console.print(f"[red][ ! ][/] New version {self.latest_version} available!")
+            if self.prompt_update():
+                self.update_tool(self.latest_version)
+        else:
+            self.console.print("[green][ ✓ ][/] You're running the latest version!")
+
     def prompt_update(self):
         """Prompt user for update confirmation"""
         return input("\n[?] Would you like to update now? (y/n): ").lower() == 'y'
@@ -121,6 +236,11 @@ class NetworkScanner:
             sys.exit(1)
 
     def handle_exit(self, signum, frame):
+        # Runs in signal context, possibly while the main thread holds the writer
+        # or connection locks; unwind first and shut down from normal code instead
+        raise KeyboardInterrupt
+
+    def shutdown(self):
         rprint("\n[yellow] Gracefully shutting down...")
         self.cleanup()
         sys.exit(0)
@@ -128,6 +248,8 @@ class NetworkScanner:
     def cleanup(self):
         try:
             self.console.print("[yellow][ * ][/] Cleaning up...")
+            self.close_connections()
+            self.stop_writer()
             for proc in psutil.process_iter(['pid', 'name']):
                 if 'nmap' in proc.info['name']:
                     proc.kill()
@@ -151,11 +273,10 @@ class NetworkScanner:
         try:
             self.console.print("[yellow][ * ][/] Setting up database...")
             conn = sqlite3.connect(self.db_path, timeout=20)
-            c = conn.cursor()
             
             # Enable WAL mode for better concurrent access
-            c.execute('PRAGMA journal_mode=WAL')
-            c.execute('PRAGMA synchronous=NORMAL')
+            tune_connection(conn, writer=True)
+            c = conn.cursor()
             
             # Create tables
             c.executescript('''
@@ -181,7 +302,7 @@ class NetworkScanner:
                 );
                 
                 CREATE INDEX IF NOT EXISTS idx_ip ON hosts(ip);
-                CREATE INDEX IF NOT EXISTS idx_ports ON ports(host_id);
+                CREATE INDEX IF NOT EXISTS idx_ports_cover ON ports(host_id, port_number, service, version);
             ''')
             
             conn.commit()
@@ -192,80 +313,131 @@ class NetworkScanner:
             logging.error(f"Database error: {e}")
             sys.exit(1)
 
-    def is_already_scanned(self, ip, hours_threshold=24):
+    def start_writer(self):
+        """Start the single thread that owns the read/write database connection"""
+        self._writer_q = queue.Queue()
+        self._writer_lock = threading.Lock()
+        self._writer_error = None
+        self._writer = threading.Thread(target=self._writer_loop, name='db-writer', daemon=True)
+        self._writer.start()
+
+    def stop_writer(self):
+        """Drain pending writes and stop the writer thread"""
+        writer = getattr(self, '_writer', None)
+        if writer is None:
+            return
+        with self._writer_lock:
+            self._writer = None
+            self._writer_q.put(None)
+        writer.join()
+
+    def _writer_loop(self):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20, isolation_level=None,
+                                   cached_statements=256)
+            tune_connection(conn, writer=True)
+            # One cursor serves every job so the prepared statements are reused
+            c = conn.cursor()
+            while True:
+                job = self._writer_q.get()
+                if job is None:
+                    break
+                fn, args, done = job
+                # Take the write lock up front so the transaction never has to upgrade
+                try:
+                    c.execute('BEGIN IMMEDIATE')
+                    result = fn(c, *args)
+                    c.execute('COMMIT')
+                except Exception as e:
+                    done.set_exception(e)
+                    if conn.in_transaction:
+                        c.execute('ROLLBACK')
+                else:
+                    done.set_result(result)
+        except Exception as e:
+            logging.error(f"Database writer failed: {e}")
+            self._fail_pending_writes(e)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _fail_pending_writes(self, error):
+        """Mark the writer as dead and fail every job still waiting in its queue"""
+        with self._writer_lock:
+            self._writer = None
+            self._writer_error = error
+        # write() no longer enqueues once _writer is None, so the queue can only shrink
+        while True:
+            try:
+                job = self._writer_q.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job[2].set_exception(error)
+
+    def write(self, fn, *args):
+        """Run fn(cursor, *args) in its own IMMEDIATE transaction on the writer thread"""
+        done = concurrent.futures.Future()
+        with self._writer_lock:
+            if self._writer is None:
+                raise RuntimeError("Database writer is not running") from self._writer_error
+            self._writer_q.put((fn, args, done))
+        return done.result()
+
+    def _reader(self):
+        """Return this thread's read-only database connection, opening it on first use"""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=20, check_same_thread=False,
+                                   cached_statements=256)
+            tune_connection(conn)
+            self._tls.conn = conn
+            with self._conn_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_connections(self):
+        """Close every read-only connection opened by this process"""
+        with self._conn_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._tls = threading.local()
+
+    def recently_scanned(self, hours_threshold=24):
+        """Return the set of IPs scanned within the threshold, in one query"""
         try:
-            with sqlite3.connect(self.db_path, timeout=20) as conn:
-                c = conn.cursor()
-                c.execute('''
-                    SELECT last_scan FROM hosts 
-                    WHERE ip = ? AND datetime(last_scan) > datetime('now', '-' || ? || ' hours')
-                ''', (ip, hours_threshold))
-                result = c.fetchone()
-                return bool(result)
+            return {row[0] for row in self._reader().execute(SQL_RECENT_HOSTS, (hours_threshold,))}
         except sqlite3.Error as e:
             logging.error(f"Database error checking scan history: {e}")
-        return False
+        return set()
 
-    def scan_host(self, ip):
-        try:
-            if self.is_already_scanned(ip) and not self.fresh_scan:
-                return None
-                
-            scan_args = f'-sS -sV -O -A --host-timeout {self.timeout}s'
-            self.nm.scan(ip, arguments=scan_args)
-            
-            if ip not in self.nm.all_hosts():
-                return None
+    def _store_host(self, c, host_row, ports):
+        """Persist one host and its ports; called through write()"""
+        # Upsert keeps the host id stable, so replace its ports instead of orphaning them
+        host_id = c.execute(SQL_UPSERT_HOST, host_row).fetchone()[0]
+        c.execute(SQL_DELETE_PORTS, (host_id,))
+        # executemany binds one row at a time against a single prepared statement
+        c.executemany(SQL_INSERT_PORT, [(host_id, port, service, ver) for port, service, ver in ports])
+        return host_id
 
-            scan_result = self.nm[ip]
-            
-            with sqlite3.connect(self.db_path, timeout=20) as conn:
-                c = conn.cursor()
-                
-                os_guess = 'Unknown'
-                try:
-                    if 'osmatch' in scan_result and scan_result['osmatch']:
-                        os_guess = scan_result['osmatch'][0].get('name', 'Unknown')
-                    elif 'osclass' in scan_result and scan_result['osclass']:
-                        os_guess = scan_result['osclass'][0].get('osfamily', 'Unknown')
-                except (KeyError, IndexError):
-                    os_guess = 'Unknown'
-                
-                c.execute('''
-                    INSERT OR REPLACE INTO hosts (ip, hostname, last_scan, os_guess, status)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (ip, socket.getfqdn(ip), datetime.now().isoformat(), 
-                     os_guess, scan_result['status']['state']))
-                
-                host_id = c.lastrowid
-                
-                for proto in scan_result.all_protocols():
-                    for port in scan_result[proto]:
-                        port_info = scan_result[proto][port]
-                        c.execute('''
-                            INSERT INTO ports (host_id, port_number, service, version)
-                            VALUES (?, ?, ?, ?)
-                        ''', (host_id, port, port_info.get('name', ''), 
-                             port_info.get('version', '')))
-                
-                conn.commit()
-            
-            self.active_hosts += 1
-            return {
-                'ip': ip,
-                'os': os_guess,
-                'ports': scan_result.get('tcp', {})
-            }
-            
-        except Exception as e:
-            logging.error(f"Error scanning {ip}: {e}")
-            return None
+    def store_result(self, result):
+        """Persist a worker's scan result and return it for display"""
+        self.write(self._store_host, result['host_row'], result['port_rows'])
+        self.active_hosts += 1
+        return result
 
     def scan_network(self, network_range):
         try:
             self.console.print(f"\n[yellow][ * ][/] Starting scan of network: {network_range}\n")
             network = ipaddress.ip_network(network_range)
-            total_hosts = sum(1 for _ in network.hosts())
+            hosts = [str(ip) for ip in network.hosts()]
+            total_hosts = len(hosts)
             completed = 0
             
             with Progress(
@@ -276,28 +448,49 @@ class NetworkScanner:
             ) as progress:
                 task = progress.add_task("[cyan]Scanning network...", total=total_hosts)
                 
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
-                    future_to_ip = {
-                        executor.submit(self.scan_host, str(ip)): ip 
-                        for ip in network.hosts()
-                    }
+                # Spawn rather than fork: the parent already runs the database writer thread
+                with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.threads,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                ) as executor:
+                    future_to_ip = {}
+                    try:
+                        recent = set() if self.fresh_scan else self.recently_scanned()
+                        for ip in hosts:
+                            if ip in recent:
+                                completed += 1
+                                continue
+                            future_to_ip[executor.submit(_scan_host, ip, self.timeout)] = ip
+                        progress.update(task, completed=completed)
                     
-                    for future in concurrent.futures.as_completed(future_to_ip):
-                        try:
-                            result = future.result()
-                            if result:
-                                self.display_result(result)
-                        except Exception as e:
-                            ip = future_to_ip[future]
-                            logging.error(f"Scan failed for {ip}: {e}")
-                        finally:
-                            completed += 1
-                            progress.update(task, completed=completed)
+                        for future in concurrent.futures.as_completed(future_to_ip):
+                            try:
+                                result = future.result()
+                                if result:
+                                    self.display_result(self.store_result(result))
+                            except Exception as e:
+                                ip = future_to_ip[future]
+                                logging.error(f"Scan failed for {ip}: {e}")
+                            finally:
+                                completed += 1
+                                progress.update(task, completed=completed)
+                    except KeyboardInterrupt:
+                        # Drop queued hosts instead of scanning them all before exiting
+                        for future in future_to_ip:
+                            future.cancel()
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        raise
+
+                self.close_connections()
+                # Refresh planner statistics now that the tables are populated
+                self.write(lambda c: c.execute('ANALYZE'))
+                self.stop_writer()
             
             self.display_summary()
             
         except KeyboardInterrupt:
-            self.handle_exit(None, None)
+            self.shutdown()
         except Exception as e:
             logging.error(f"Critical error: {e}")
         finally:
@@ -323,7 +516,7 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument('target', help='Target network range (CIDR notation)')
-    parser.add_argument('-t', '--threads', type=int, default=10, help='Number of concurrent threads')
+    parser.add_argument('-t', '--threads', type=int, default=10, help='Number of concurrent scan workers')
     parser.add_argument('--timeout', type=int, default=300, help='Timeout per host in seconds')
     parser.add_argument('--db', default='scanner.db', help='Database file path')
     parser.add_argument('--fresh', action='store_true', help='Ignore previous scans')
@@ -338,7 +531,8 @@ def main():
     scanner = NetworkScanner(
         db_path=args.db,
         threads=args.threads,
-        timeout=args.timeout
+        timeout=args.timeout,
+        check_updates=not args.no_update
     )
     scanner.fresh_scan = args.fresh
     scanner.start_time = datetime.now()
@@ -347,6 +541,10 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     scanner.scan_network(args.target)
+    try:
+        scanner.report_updates()
+    except KeyboardInterrupt:
+        scanner.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -2,13 +2,61 @@
 
 import sqlite3
 import argparse
+import os
+import sys
 from rich.console import Console
 from rich.table import Table
 from rich.style import Style
 from rich import box
-from typing import List, Dict, Optional
+from typing import Iterator, Optional
 from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
+
+CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA cache_size=-65536;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+"""
+
+_CONSOLE = Console()
+_STATUS_STYLES = {
+    "up": Style(color="green"),
+    "down": Style(color="red"),
+    "unknown": Style(color="yellow")
+}
+
+# Display strings and fallbacks are built by SQLite; the open-ports filter uses the per-host count.
+# Kept as constants so repeated calls hit the sqlite3 statement cache.
+_SQL_HOSTS_TEMPLATE = """
+    SELECT h.id, h.ip,
+           COALESCE(NULLIF(h.hostname, ''), 'N/A') AS hostname,
+           h.last_scan,
+           COALESCE(NULLIF(h.os_guess, ''), 'Unknown') AS os_guess,
+           h.status,
+           COALESCE((SELECT GROUP_CONCAT(port_number || '/' || service, ', ')
+                     FROM (SELECT port_number, service
+                           FROM ports
+                           WHERE host_id = h.id
+                           ORDER BY port_number)),
+                    'No open ports') AS ports_str,
+           (SELECT COUNT(*) FROM ports WHERE host_id = h.id) AS port_count
+    FROM hosts h
+    {where}
+    ORDER BY h.id
+"""
+_SQL_HOSTS_WITH_PORTS = _SQL_HOSTS_TEMPLATE.format(where="")
+_SQL_HOSTS_WITH_OPEN_PORTS = _SQL_HOSTS_TEMPLATE.format(where="WHERE port_count > 0")
+_SQL_HAS_COVERING_INDEX = "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_ports_cover'"
+# Same name as the scanner's index, so scanner databases are left untouched
+_SQL_CREATE_COVERING_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_ports_cover
+    ON ports(host_id, port_number, service, version)
+"""
+
+# Databases already switched to WAL and indexed in this process
+_PREPARED_DBS = set()
 
 @dataclass
 class Host:
@@ -18,69 +66,90 @@ class Host:
     last_scan: str
     os_guess: str
     status: str
-    ports: List[Dict]
+    ports_str: str
+    port_count: int
 
 class NetworkDB:
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.console = Console()
+        self.console = _CONSOLE
+        self._conn: Optional[sqlite3.Connection] = None
 
     def connect(self) -> sqlite3.Connection:
-        """Establish database connection"""
+        """Return the viewer's persistent read-only connection, opening it on first use"""
+        if self._conn is not None:
+            return self._conn
+        self.prepare_database()
         try:
-            return sqlite3.connect(self.db_path)
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=256)
         except sqlite3.Error as e:
             self.console.print(f"[red]Error connecting to database: {e}[/red]")
             raise
-
-    def get_host_ports(self, conn: sqlite3.Connection, host_id: int) -> List[Dict]:
-        """Retrieve ports for a specific host"""
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT port_number, service, version 
-            FROM ports 
-            WHERE host_id = ?
-            ORDER BY port_number
-        """, (host_id,))
-        return [{"port": port, "service": svc, "version": ver} 
-                for port, svc, ver in cursor.fetchall()]
-
-    def get_all_hosts(self) -> List[Host]:
-        """Retrieve all hosts with their associated ports"""
-        with self.connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, ip, hostname, last_scan, os_guess, status 
-                FROM hosts
-                ORDER BY id
-            """)
-            
-            hosts = []
-            for row in cursor.fetchall():
-                host_id, ip, hostname, last_scan, os_guess, status = row
-                ports = self.get_host_ports(conn, host_id)
-                hosts.append(Host(
-                    id=host_id,
-                    ip=ip,
-                    hostname=hostname,
-                    last_scan=last_scan,
-                    os_guess=os_guess or "Unknown",
-                    status=status,
-                    ports=ports
-                ))
-            return hosts
-
-    def format_ports(self, ports: List[Dict]) -> str:
-        """Format ports list into a readable string"""
-        if not ports:
-            return "No open ports"
-        return ", ".join(f"{p['port']}/{p['service']}" for p in ports)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(CONNECTION_PRAGMAS)
+        self._conn = conn
+        return conn
+
+    def close(self):
+        """Close the persistent connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def prepare_database(self):
+        """Once per process, switch to WAL and add the covering ports index"""
+        if self.db_path in _PREPARED_DBS or not Path(self.db_path).exists():
+            return
+        _PREPARED_DBS.add(self.db_path)
+        try:
+            conn = sqlite3.connect(self.db_path)
+        except sqlite3.Error:
+            return
+        try:
+            # WAL lets the viewer read while a scan is writing
+            conn.execute("PRAGMA journal_mode=WAL")
+            if not conn.execute(_SQL_HAS_COVERING_INDEX).fetchone():
+                conn.execute(_SQL_CREATE_COVERING_INDEX)
+                conn.execute("ANALYZE")
+                conn.commit()
+        except sqlite3.Error:
+            # Read-only media or foreign databases still display, just without the tuning
+            pass
+        finally:
+            conn.close()
+
+    def get_host_rows(self, show_all: bool = True) -> Iterator[sqlite3.Row]:
+        """Yield raw host summary rows, in the column order of the Host dataclass"""
+        sql = _SQL_HOSTS_WITH_PORTS if show_all else _SQL_HOSTS_WITH_OPEN_PORTS
+        yield from self.connect().execute(sql)
+
+    def get_all_hosts(self, show_all: bool = True) -> Iterator[Host]:
+        """Yield hosts with their port summary, optionally only those with open ports"""
+        for row in self.get_host_rows(show_all):
+            yield Host(*row)
+
+    def write_plain(self, show_all: bool = False):
+        """Write hosts as tab-separated lines, for when output is piped"""
+        _write = sys.stdout.write
+        try:
+            _write("ID\tIP Address\tHostname\tStatus\tOS\tOpen Ports\tLast Scan\n")
+            for row in self.get_host_rows(show_all):
+                _write(f"{row[0]}\t{row[1]}\t{row[2]}\t{row[5]}\t{row[4]}\t{row[6]}\t{row[3]}\n")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader (e.g. `head`) went away; silence the flush at interpreter exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
 
     def display_hosts(self, show_all: bool = False):
         """Display hosts in a Rich table format"""
         try:
-            hosts = self.get_all_hosts()
-            
+            # Skip Rich's layout pipeline entirely when nobody is looking at a terminal
+            if not self.console.is_terminal:
+                self.write_plain(show_all)
+                return
+
             table = Table(
                 title="Network Hosts Inventory",
                 box=box.ROUNDED,
@@ -97,28 +166,22 @@ class NetworkDB:
             table.add_column("Open Ports", justify="left")
             table.add_column("Last Scan", justify="right")
 
-            # Status styles
-            status_styles = {
-                "up": Style(color="green"),
-                "down": Style(color="red"),
-                "unknown": Style(color="yellow")
-            }
-
-            for host in hosts:
-                # Skip hosts with no open ports if show_all is False
-                if not show_all and not host.ports:
-                    continue
-
-                status_style = status_styles.get(host.status.lower(), status_styles["unknown"])
+            # Rows go straight into the table; Host objects are for library callers.
+            # Bind the per-row lookups to locals once, outside the loop.
+            _add = table.add_row
+            _style_for = _STATUS_STYLES.get
+            _unknown = _STATUS_STYLES["unknown"]
+            for row in self.get_host_rows(show_all):
+                status_style = _style_for(row[5].casefold(), _unknown)
                 
-                table.add_row(
-                    str(host.id),
-                    host.ip,
-                    host.hostname or "N/A",
-                    host.status,
-                    host.os_guess,
-                    self.format_ports(host.ports),
-                    host.last_scan,
+                _add(
+                    str(row[0]),  # id
+                    row[1],       # ip
+                    row[2],       # hostname
+                    row[5],       # status
+                    row[4],       # os_guess
+                    row[6],       # ports_str
+                    row[3],       # last_scan
                     style=status_style
                 )
 
@@ -148,9 +211,9 @@ def main():
     try:
         db = NetworkDB(args.database)
         db.display_hosts(show_all=args.all)
+        db.close()
     except Exception as e:
-        console = Console()
-        console.print(f"[red]Error: {e}[/red]")
+        _CONSOLE.print(f"[red]Error: {e}[/red]")
         exit(1)
 
 if __name__ == "__main__":